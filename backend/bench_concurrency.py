@@ -0,0 +1,103 @@
+"""Concurrent request throughput: threadpool handlers vs. handlers on the event loop.
+
+Usage:
+    python bench_concurrency.py [--requests 400] [--concurrency 50] [--query-delay-ms 2]
+
+The "event loop" variant reproduces the previous layout, where `async def`
+handlers called the blocking SQLAlchemy session directly. The "threadpool"
+variant is the current app, where FastAPI runs the `def` handlers in its
+bounded worker pool. --query-delay-ms adds a GIL-releasing wait to every SQL
+statement to stand in for disk and lock waits on a loaded database.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(tempfile.mkdtemp(prefix="kindred_bench_"))
+
+import httpx  # noqa: E402
+from anyio import to_thread  # noqa: E402
+from fastapi import Depends, FastAPI, Response  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import main  # noqa: E402
+
+
+def seed(post_count=200):
+    main.Base.metadata.create_all(bind=main.engine)
+    db = main.SessionLocal()
+    try:
+        user = main.User(username="bench", email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        for i in range(post_count):
+            db.add(main.Post(title=f"post {i}", content="benchmark content " * 10, owner_id=user.id))
+        db.commit()
+        main.reconcile_counters(db)
+        return main.create_access_token(data={"sub": user.username})
+    finally:
+        db.close()
+
+
+def build_event_loop_app():
+    legacy = FastAPI()
+
+    @legacy.get("/api/posts")
+    async def legacy_posts(response: Response, limit: int = 20, token: str = Depends(main.oauth2_scheme)):
+        db = main.SessionLocal()
+        try:
+            user = main.get_current_user(token, db)
+            return main.get_posts(response, 0, limit, None, user, db)
+        finally:
+            db.close()
+
+    return legacy
+
+
+async def run(app, token, total, concurrency):
+    to_thread.current_default_thread_limiter().total_tokens = main.THREADPOOL_SIZE
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get("/api/posts?limit=20", headers=headers)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return {"rps": total / elapsed, "elapsed": elapsed}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--query-delay-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    token = seed()
+    if args.query_delay_ms:
+        delay = args.query_delay_ms / 1000
+
+        @event.listens_for(main.engine, "before_cursor_execute")
+        def simulate_io_wait(*_):
+            time.sleep(delay)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"query delay {args.query_delay_ms} ms, threadpool {main.THREADPOOL_SIZE}")
+    for name, app in (("event loop (before)", build_event_loop_app()), ("threadpool (after)", main.app)):
+        result = asyncio.run(run(app, token, args.requests, args.concurrency))
+        print(f"{name:22} {result['rps']:8.1f} req/s   {result['elapsed']:6.2f} s total")
+
+
+if __name__ == "__main__":
+    main_cli()
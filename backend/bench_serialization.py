@@ -0,0 +1,143 @@
+"""Per-page cost of the ORM + response_model path versus the fast JSON row path.
+
+Usage:
+    python bench_serialization.py [--pages 500] [--limit 20] [--users 200]
+
+Each timed run covers building one list page and turning it into response
+bytes. Two lists are measured:
+
+- a posts page, as served by GET /api/posts;
+- a users list, as served by GET /api/users/{username}/followers.
+
+The "model" path loads ORM objects, builds Pydantic objects
+(hydrate_posts / UserResponse.from_orm) and runs FastAPI's serialize_response
+with the route's own response field. The "rows" path uses the
+column-selective queries and the FastJSONResponse renderer that the routes
+now use.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(tempfile.mkdtemp(prefix="kindred_bench_"))
+warnings.simplefilter("ignore")
+
+from fastapi.routing import serialize_response  # noqa: E402
+
+import main  # noqa: E402
+
+
+def seed(users, posts):
+    main.Base.metadata.create_all(bind=main.engine)
+    db = main.SessionLocal()
+    try:
+        db.add_all(
+            main.User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x", bio="benchmark bio " * 5)
+            for i in range(users)
+        )
+        db.commit()
+        user_ids = [row[0] for row in db.query(main.User.id).order_by(main.User.id).all()]
+        db.add_all(
+            main.Post(title=f"post {i}", content="benchmark content " * 20, owner_id=user_ids[i % users])
+            for i in range(posts)
+        )
+        db.add_all(main.Follow(follower_id=user_id, followed_id=user_ids[0]) for user_id in user_ids[1:])
+        db.commit()
+        return user_ids[0]
+    finally:
+        db.close()
+
+
+def route_field(path):
+    return next(
+        route for route in main.app.routes
+        if getattr(route, "path", None) == path and "GET" in route.methods
+    ).response_field
+
+
+def serialize(field, content):
+    return asyncio.run(serialize_response(field=field, response_content=content, is_coroutine=False, dump_json=True))
+
+
+def posts_model(db, viewer, limit, field):
+    posts = db.query(main.Post).filter(main.Post.is_published == True).order_by(
+        main.Post.created_at.desc(), main.Post.id.desc()
+    ).limit(limit).all()
+    return serialize(field, main.hydrate_posts(db, posts, viewer))
+
+
+def posts_rows(db, viewer, limit):
+    rows = main.post_rows_query(db).filter(main.Post.is_published == True).order_by(
+        main.Post.created_at.desc(), main.Post.id.desc()
+    ).limit(limit).all()
+    return main.FastJSONResponse(main.post_row_dicts(db, rows, viewer)).body
+
+
+def users_model(db, user_id, field):
+    users = db.query(main.User).join(main.Follow, main.User.id == main.Follow.follower_id).filter(
+        main.Follow.followed_id == user_id
+    ).all()
+    return serialize(field, [main.UserResponse.from_orm(user) for user in users])
+
+
+def users_rows(db, user_id):
+    rows = main.user_rows_query(db).join(main.Follow, main.User.id == main.Follow.follower_id).filter(
+        main.Follow.followed_id == user_id
+    ).all()
+    return main.FastJSONResponse(main.user_row_dicts(rows)).body
+
+
+def measure(pages, build):
+    db = main.SessionLocal()
+    try:
+        build(db)  # warm up statement caches
+        started = time.perf_counter()
+        for _ in range(pages):
+            body = build(db)
+            db.expire_all()
+        return (time.perf_counter() - started) / pages, len(body)
+    finally:
+        db.close()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    popular_id = seed(args.users, posts=args.limit * 10)
+    db = main.SessionLocal()
+    viewer = db.get(main.User, popular_id)
+    db.expunge(viewer)
+    db.close()
+    post_field = route_field("/api/posts")
+    user_field = route_field("/api/users/{username}/followers")
+
+    cases = [
+        (f"posts page ({args.limit})",
+         lambda db: posts_model(db, viewer, args.limit, post_field),
+         lambda db: posts_rows(db, viewer, args.limit)),
+        (f"followers ({args.users - 1})",
+         lambda db: users_model(db, popular_id, user_field),
+         lambda db: users_rows(db, popular_id)),
+    ]
+
+    encoder = "orjson" if main.orjson is not None else "json (orjson not installed)"
+    print(f"{args.pages} pages per case, encoder: {encoder}")
+    for label, model_path, row_path in cases:
+        model_seconds, model_bytes = measure(args.pages, model_path)
+        row_seconds, row_bytes = measure(args.pages, row_path)
+        print(f"{label:20} model {model_seconds * 1000:7.3f} ms   rows {row_seconds * 1000:7.3f} ms   "
+              f"{model_seconds / row_seconds:5.2f}x   ({model_bytes} / {row_bytes} bytes)")
+
+
+if __name__ == "__main__":
+    main_cli()
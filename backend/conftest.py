@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# main.py uses sql_app.db and uploads/ relative to the working directory, so
+# run the suite from a scratch directory. Each test gets a fresh schema from
+# create_all; the migration path is covered in test_migrations.py.
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(tempfile.mkdtemp(prefix="kindred_test_"))
+
+import main  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+# test_api.py drives a live server over HTTP and is run by hand.
+collect_ignore = ["test_api.py"]
+
+
+@pytest.fixture(autouse=True)
+def reset_db():
+    main.Base.metadata.drop_all(bind=main.engine)
+    main.Base.metadata.create_all(bind=main.engine)
+    main.feed_cache.clear()
+    main.principal_cache.clear()
+    yield
+    main.view_counter.flush()
+    main.notification_queue.flush()
+
+
+@pytest.fixture
+def db():
+    session = main.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def make_user(db, username):
+    user = main.User(
+        username=username,
+        email=f"{username}@example.com",
+        hashed_password="not-a-real-hash",
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def auth_headers(user):
+    token = main.create_access_token(data={"sub": user.username})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+import main
+from conftest import make_user, auth_headers
+
+
+def seed_directory(db):
+    admin = make_user(db, "admin")
+    admin.is_master = True
+    admin.joined_date = datetime(2024, 1, 1)
+    for i, role in enumerate(["member", "guide", "vice_admin", "member", "member"]):
+        user = make_user(db, f"user{i}")
+        user.joined_date = datetime(2024, 1, 2) + timedelta(days=i)
+        user.is_guide = role == "guide"
+        user.is_vice_admin = role == "vice_admin"
+    make_user(db, "under_score").joined_date = datetime(2024, 2, 1)
+    db.commit()
+    return admin
+
+
+def test_listing_pages_with_a_cursor_in_join_order(db, client):
+    headers = auth_headers(seed_directory(db))
+
+    first = client.get("/api/admin/users?limit=4", headers=headers)
+    second = client.get(f"/api/admin/users?limit=4&cursor={first.headers['X-Next-Cursor']}", headers=headers)
+
+    names = [u["username"] for u in first.json() + second.json()]
+    assert names == ["admin", "user0", "user1", "user2", "user3", "user4", "under_score"]
+    assert "X-Next-Cursor" not in second.headers
+    assert first.json()[1]["followers_count"] == 0
+
+
+def test_listing_filters_by_role_and_search(db, client):
+    headers = auth_headers(seed_directory(db))
+
+    def names(query):
+        response = client.get(f"/api/admin/users?{query}", headers=headers)
+        assert response.status_code == 200, response.text
+        return [u["username"] for u in response.json()]
+
+    assert names("role=member") == ["user0", "user3", "user4", "under_score"]
+    assert names("role=vice_admin") == ["user2"]
+    assert names("role=member&q=USER3") == ["user3"]
+    assert names("q=r_s") == ["under_score"]  # _ is matched literally, not as a wildcard
+    assert client.get("/api/admin/users?role=owner", headers=headers).status_code == 400
+
+
+def test_summary_counts_each_role_once(db, client):
+    headers = auth_headers(seed_directory(db))
+
+    summary = client.get("/api/admin/users/summary", headers=headers).json()
+
+    assert summary == {"total": 7, "master": 1, "vice_admin": 1, "guide": 1, "member": 4}
+
+
+def test_export_streams_filtered_rows_in_batches(db, client, monkeypatch):
+    headers = auth_headers(seed_directory(db))
+    monkeypatch.setattr(main, "USER_EXPORT_BATCH_SIZE", 2)
+
+    batch_sizes = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement and "ORDER BY users.id" in statement:
+            batch_sizes.append(context.execution_options.get("yield_per"))
+
+    event.listen(main.engine, "before_cursor_execute", capture)
+    try:
+        response = client.get("/api/admin/users/export?role=member", headers=headers)
+    finally:
+        event.remove(main.engine, "before_cursor_execute", capture)
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.content.splitlines()]
+    assert [row["username"] for row in rows] == ["user0", "user3", "user4", "under_score"]
+    assert rows[0]["is_active"] is True
+    assert batch_sizes == [2]
+
+    exported = client.get("/api/admin/users/export?format=csv&q=user1", headers=headers)
+    assert exported.headers["content-disposition"] == 'attachment; filename="users.csv"'
+    records = list(csv.DictReader(io.StringIO(exported.text)))
+    assert [(r["username"], r["is_guide"], r["joined_date"]) for r in records] == [("user1", "True", "2024-01-03T00:00:00")]
+
+
+def test_csv_export_neutralises_formula_cells(db, client):
+    headers = auth_headers(seed_directory(db))
+    make_user(db, "=HYPERLINK(1)")
+    make_user(db, "-2+3")
+
+    exported = client.get("/api/admin/users/export?format=csv&q=(1", headers=headers)
+    records = list(csv.DictReader(io.StringIO(exported.text)))
+    assert [(r["username"], r["email"]) for r in records] == [("'=HYPERLINK(1)", "'=HYPERLINK(1)@example.com")]
+    ndjson = client.get("/api/admin/users/export?q=-2", headers=headers).json()
+    assert ndjson["username"] == "-2+3"
+
+
+def test_directory_requires_a_master_admin(db, client):
+    member = make_user(db, "member")
+    for url in ("/api/admin/users", "/api/admin/users/summary", "/api/admin/users/export"):
+        assert client.get(url, headers=auth_headers(member)).status_code == 403
@@ -0,0 +1,176 @@
+import re
+
+import main
+from conftest import make_user, auth_headers
+from test_hydration import QueryCounter
+
+
+def test_follow_and_unfollow_maintain_user_counters(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+
+    assert client.post("/api/users/bob/follow", headers=auth_headers(alice)).status_code == 200
+    db.expire_all()
+    assert (alice.following_count, bob.followers_count) == (1, 1)
+
+    profile = client.get("/api/users/bob", headers=auth_headers(alice)).json()
+    assert profile["followers_count"] == 1
+
+    assert client.delete("/api/users/bob/unfollow", headers=auth_headers(alice)).status_code == 200
+    db.expire_all()
+    assert (alice.following_count, bob.followers_count) == (0, 0)
+
+
+def test_post_like_and_comment_counters(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+
+    post_id = client.post("/api/posts", json={"content": "hello"}, headers=auth_headers(alice)).json()["id"]
+    like = client.post(f"/api/posts/{post_id}/like", headers=auth_headers(bob)).json()
+    assert like["likes_count"] == 1
+
+    comment = client.post(
+        f"/api/posts/{post_id}/comments", json={"text": "nice"}, headers=auth_headers(bob)
+    ).json()
+    client.post(
+        f"/api/posts/{post_id}/comments", json={"text": "thanks", "parent_id": comment["id"]},
+        headers=auth_headers(alice)
+    )
+    assert client.post(f"/api/comments/{comment['id']}/like", headers=auth_headers(alice)).json()["likes_count"] == 1
+
+    comments = client.get(f"/api/posts/{post_id}/comments", headers=auth_headers(bob)).json()
+    assert comments[0]["replies_count"] == 1
+    assert comments[0]["likes_count"] == 1
+
+    post = client.get(f"/api/posts/{post_id}", headers=auth_headers(bob)).json()
+    assert (post["likes_count"], post["comments_count"]) == (1, 2)
+
+    assert client.delete(f"/api/posts/{post_id}/unlike", headers=auth_headers(bob)).json()["likes_count"] == 0
+    db.expire_all()
+    assert alice.posts_count == 1
+
+    client.delete(f"/api/posts/{post_id}", headers=auth_headers(alice))
+    db.expire_all()
+    assert alice.posts_count == 0
+
+
+def test_reconcile_counters_reports_and_fixes_drift(db):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    post = main.Post(content="hello", owner_id=alice.id)
+    db.add(post)
+    db.flush()
+    db.add(main.Like(owner_id=bob.id, post_id=post.id))
+    db.add(main.Follow(follower_id=bob.id, followed_id=alice.id))
+    db.commit()
+
+    drift = main.reconcile_counters(db, dry_run=True)
+    assert {(d["table"], d["column"], d["actual"]) for d in drift} == {
+        ("users", "posts_count", 1),
+        ("users", "followers_count", 1),
+        ("users", "following_count", 1),
+        ("posts", "likes_count", 1),
+        ("users", "likes_received_count", 1),
+    }
+    db.expire_all()
+    assert alice.posts_count == 0
+
+    assert len(main.reconcile_counters(db)) == 5
+    db.expire_all()
+    assert (alice.posts_count, alice.followers_count, post.likes_count, alice.likes_received_count) == (1, 1, 1, 1)
+    assert main.reconcile_counters(db) == []
+
+
+def test_unread_notification_counter_follows_writes_and_reads(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    carol = make_user(db, "carol")
+    headers = auth_headers(alice)
+
+    def unread():
+        main.notification_queue.flush()
+        return client.get("/api/notifications/unread-count", headers=headers).json()["unread_count"]
+
+    post_id = client.post("/api/posts", json={"content": "hello"}, headers=headers).json()["id"]
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(bob))
+    client.post("/api/users/alice/follow", headers=auth_headers(bob))
+    assert unread() == 2
+
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(carol))  # folded into the unread like row
+    assert unread() == 2
+
+    like_id = next(n["id"] for n in client.get("/api/notifications", headers=headers).json() if n["type"] == "like")
+    client.put(f"/api/notifications/{like_id}/read", headers=headers)
+    client.put(f"/api/notifications/{like_id}/read", headers=headers)
+    assert unread() == 1
+
+    client.post(f"/api/posts/{post_id}/comments", json={"text": "hi"}, headers=auth_headers(carol))
+    assert unread() == 2
+    client.delete(f"/api/posts/{post_id}", headers=headers)
+    assert unread() == 1
+
+    client.put("/api/notifications/mark-all-read", headers=headers)
+    assert unread() == 0
+    assert main.reconcile_counters(db, dry_run=True) == []
+
+
+def test_reconcile_repairs_drifted_unread_counters(db):
+    alice = make_user(db, "alice")
+    db.add_all(main.Notification(recipient_id=alice.id, type="follow", message="m") for _ in range(3))
+    db.commit()
+
+    drift = main.reconcile_counters(db)
+
+    assert [(d["column"], d["stored"], d["actual"]) for d in drift] == [("unread_notifications_count", 0, 3)]
+    db.expire_all()
+    assert alice.unread_notifications_count == 3
+
+
+def test_creator_stats_are_kept_on_the_user_row(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    headers, bob_headers = auth_headers(alice), auth_headers(bob)
+    kept = client.post("/api/posts", json={"content": "kept"}, headers=headers).json()["id"]
+    deleted = client.post("/api/posts", json={"content": "deleted"}, headers=headers).json()["id"]
+    for post_id in (kept, deleted):
+        client.post(f"/api/posts/{post_id}/like", headers=bob_headers)
+        client.post(f"/api/posts/{post_id}/comments", json={"text": "hi"}, headers=bob_headers)
+        client.get(f"/api/posts/{post_id}", headers=bob_headers)
+    comment_id = client.post(f"/api/posts/{kept}/comments", json={"text": "again"}, headers=bob_headers).json()["id"]
+    main.view_counter.flush()
+    client.get(f"/api/posts/{kept}", headers=bob_headers)  # still buffered
+
+    client.delete(f"/api/posts/{deleted}", headers=headers)
+    client.delete(f"/api/comments/{comment_id}", headers=bob_headers)
+    client.delete(f"/api/posts/{kept}/unlike", headers=bob_headers)
+    client.post(f"/api/posts/{kept}/like", headers=headers)
+
+    with QueryCounter(main.engine) as counter:
+        stats = client.get("/api/stats/overview", headers=headers).json()
+
+    assert (stats["total_posts"], stats["total_likes"], stats["total_comments"], stats["total_views"]) == (1, 1, 1, 2)
+    assert all(re.findall(r"(?:FROM|JOIN) (\w+)", statement) == ["users"] for statement in counter.statements)
+    main.view_counter.flush()
+    assert main.reconcile_counters(db, dry_run=True) == []
+
+
+def test_deleting_a_post_takes_off_counts_written_after_it_was_loaded(db, client, monkeypatch):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    post_id = client.post("/api/posts", json={"content": "hello"}, headers=auth_headers(alice)).json()["id"]
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(bob))
+    release_upload = main.release_upload
+
+    def like_while_deleting(session, url):
+        # Another request's like, committed after delete_post loaded the post
+        session.add(main.Like(owner_id=alice.id, post_id=post_id))
+        main.bump_counter(session, main.Post.likes_count, post_id, 1)
+        main.bump_counter(session, main.User.likes_received_count, alice.id, 1)
+        release_upload(session, url)
+
+    monkeypatch.setattr(main, "release_upload", like_while_deleting)
+    assert client.delete(f"/api/posts/{post_id}", headers=auth_headers(alice)).status_code == 200
+
+    db.expire_all()
+    assert alice.likes_received_count == 0
+    assert main.reconcile_counters(db, dry_run=True) == []
@@ -0,0 +1,76 @@
+import main
+from conftest import make_user, auth_headers
+
+
+def get_feed(client, user, query="limit=20"):
+    response = client.get(f"/api/feed?{query}", headers=auth_headers(user))
+    assert response.status_code == 200
+    return response.json()
+
+
+def setup_users(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    client.post("/api/users/alice/follow", headers=auth_headers(bob))
+    post_id = client.post("/api/posts", json={"title": "hello", "content": "c"}, headers=auth_headers(alice)).json()["id"]
+    return alice, bob, post_id
+
+
+def test_repeat_reads_hit_the_cache(db, client):
+    alice, bob, _ = setup_users(db, client)
+    get_feed(client, bob)
+    get_feed(client, bob)
+    stats = main.feed_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_like_invalidates_pages_containing_the_post(db, client):
+    alice, bob, post_id = setup_users(db, client)
+    get_feed(client, alice)
+    assert get_feed(client, bob)[0]["is_liked"] is False
+
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(bob))
+    assert get_feed(client, bob)[0]["is_liked"] is True
+    assert get_feed(client, alice)[0]["likes_count"] == 1
+
+    client.delete(f"/api/posts/{post_id}/unlike", headers=auth_headers(bob))
+    assert get_feed(client, bob)[0]["likes_count"] == 0
+
+
+def test_writes_invalidate_affected_feeds(db, client):
+    alice, bob, post_id = setup_users(db, client)
+    carol = make_user(db, "carol")
+    assert [p["title"] for p in get_feed(client, bob)] == ["hello"]
+
+    client.post("/api/posts", json={"title": "second", "content": "c"}, headers=auth_headers(alice))
+    assert [p["title"] for p in get_feed(client, bob)] == ["second", "hello"]
+
+    client.put(f"/api/posts/{post_id}", json={"title": "edited"}, headers=auth_headers(alice))
+    assert [p["title"] for p in get_feed(client, bob)] == ["second", "edited"]
+
+    client.post("/api/posts", json={"title": "carol", "content": "c"}, headers=auth_headers(carol))
+    client.post("/api/users/carol/follow", headers=auth_headers(bob))
+    assert [p["title"] for p in get_feed(client, bob)][0] == "carol"
+
+    client.delete("/api/users/carol/unfollow", headers=auth_headers(bob))
+    client.delete(f"/api/posts/{post_id}", headers=auth_headers(alice))
+    assert [p["title"] for p in get_feed(client, bob)] == ["second"]
+
+
+def test_cache_evicts_least_recently_used():
+    cache = main.FeedPageCache(max_entries=2, ttl_seconds=60)
+    cache.put((1, None, 0, 20), [], None)
+    cache.put((2, None, 0, 20), [], None)
+    assert cache.get((1, None, 0, 20)) is not None
+    cache.put((3, None, 0, 20), [], None)
+    assert cache.get((2, None, 0, 20)) is None
+    assert cache.get((1, None, 0, 20)) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_metrics_endpoint_reports_cache_stats(db, client):
+    admin = make_user(db, "admin")
+    admin.is_master = True
+    db.commit()
+    stats = client.get("/api/admin/metrics", headers=auth_headers(admin)).json()["feed_cache"]
+    assert {"hits", "misses", "entries", "max_entries"} <= stats.keys()
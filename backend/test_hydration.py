@@ -0,0 +1,102 @@
+from sqlalchemy import event
+
+import main
+from conftest import make_user, auth_headers
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements = []
+
+    def _on_execute(self, conn, cursor, statement, *args, **kwargs):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def seed_posts(db, count):
+    viewer = make_user(db, "viewer")
+    authors = [make_user(db, f"author{i}") for i in range(5)]
+    for author in authors:
+        db.add(main.Follow(follower_id=viewer.id, followed_id=author.id))
+    for i in range(count):
+        author = authors[i % len(authors)]
+        post = main.Post(title=f"post {i}", content=f"content {i}", owner_id=author.id)
+        db.add(post)
+        db.flush()
+        db.add(main.Like(owner_id=authors[0].id, post_id=post.id))
+        if i % 2 == 0:
+            db.add(main.Like(owner_id=viewer.id, post_id=post.id))
+        db.add(main.Comment(text="hi", owner_id=viewer.id, post_id=post.id))
+    db.commit()
+    main.reconcile_counters(db)
+    main.rebuild_timelines(db)
+    return viewer
+
+
+def count_queries(client, url, headers):
+    with QueryCounter(main.engine) as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return counter.count, response.json()
+
+
+def test_hydrate_posts_fills_counts_and_is_liked(db, client):
+    viewer = seed_posts(db, 4)
+    response = client.get("/api/posts?limit=4", headers=auth_headers(viewer))
+    assert response.status_code == 200
+    posts = {p["title"]: p for p in response.json()}
+    assert posts["post 0"]["likes_count"] == 2
+    assert posts["post 0"]["is_liked"] is True
+    assert posts["post 1"]["likes_count"] == 1
+    assert posts["post 1"]["is_liked"] is False
+    assert posts["post 1"]["comments_count"] == 1
+    assert posts["post 1"]["owner_username"] == "author1"
+
+
+def test_list_endpoints_query_count_is_constant(db, client):
+    viewer = seed_posts(db, 30)
+    headers = auth_headers(viewer)
+    client.get("/api/users/me", headers=headers)  # warm the principal cache
+    for url in ("/api/posts", "/api/feed", "/api/users/author0/posts", "/api/search/posts?q=content"):
+        sep = "&" if "?" in url else "?"
+        small, small_body = count_queries(client, f"{url}{sep}limit=2", headers)
+        large, large_body = count_queries(client, f"{url}{sep}limit=6", headers)
+        assert len(large_body) > len(small_body), url
+        assert small == large, f"{url}: {small} queries for 2 posts vs {large} for 6"
+
+
+def test_fast_json_lists_match_the_response_models(db, client):
+    viewer = seed_posts(db, 6)
+    headers = auth_headers(viewer)
+    posts = db.query(main.Post).order_by(main.Post.created_at.desc(), main.Post.id.desc()).all()
+    expected_posts = [post.model_dump(mode="json") for post in main.hydrate_posts(db, posts, viewer)]
+    following = db.query(main.User).filter(main.User.username != "viewer").order_by(main.User.id).all()
+    expected_users = [main.UserResponse.model_validate(user).model_dump(mode="json") for user in following]
+
+    assert client.get("/api/posts", headers=headers).json() == expected_posts
+    assert client.get("/api/feed", headers=headers).json() == expected_posts
+    assert client.get("/api/users/viewer/following", headers=headers).json() == expected_users
+
+    schema = client.get("/openapi.json").json()["paths"]
+    assert schema["/api/posts"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]["items"] == {
+        "$ref": "#/components/schemas/PostResponse"
+    }
+
+
+def test_fast_json_keeps_the_pagination_header(db, client):
+    viewer = seed_posts(db, 3)
+
+    response = client.get("/api/posts?limit=2", headers=auth_headers(viewer))
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["X-Next-Cursor"]
+    assert len(client.get(f"/api/posts?limit=2&cursor={response.headers['X-Next-Cursor']}", headers=auth_headers(viewer)).json()) == 1
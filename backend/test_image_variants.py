@@ -0,0 +1,104 @@
+import io
+import os
+import time
+
+import pytest
+
+import main
+from conftest import make_user, auth_headers
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def jpeg_with_exif(width, height):
+    image = Image.new("RGB", (width, height), (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees clockwise
+    exif[0x010F] = "Camera Maker"
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+def wait_for_variants(url, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        urls = main.image_variants.urls(url)
+        if urls:
+            return urls
+        time.sleep(0.05)
+    raise AssertionError(f"variants for {url} were not generated")
+
+
+def test_generate_variants_resizes_and_strips_metadata(tmp_path):
+    source = tmp_path / "post_1.jpg"
+    source.write_bytes(jpeg_with_exif(2000, 1000))
+
+    written = main.generate_variants(str(source))
+
+    assert set(written) == {"avatar", "thumb", "feed"}
+    with Image.open(tmp_path / written["feed"]) as feed:
+        assert feed.format == "WEBP"
+        assert feed.size == (1000, 2000)  # rotated to portrait, narrower than 1080 so not upscaled
+        assert not feed.getexif()
+    with Image.open(tmp_path / written["thumb"]) as thumb:
+        assert thumb.width == 320
+
+
+def test_small_avatar_is_cropped_square_without_upscaling(tmp_path):
+    source = tmp_path / "7_1.png"
+    Image.new("RGBA", (60, 40), (0, 0, 255, 128)).save(source)
+
+    written = main.generate_variants(str(source))
+
+    with Image.open(tmp_path / written["avatar"]) as avatar:
+        assert avatar.size == (40, 40)
+        assert avatar.mode == "RGBA"
+
+
+def test_uploaded_post_image_exposes_variants_in_responses(db, client):
+    user = make_user(db, "alice")
+    headers = auth_headers(user)
+
+    upload = client.post("/api/upload/image", files={"file": ("a.jpg", jpeg_with_exif(1600, 1200), "image/jpeg")}, headers=headers)
+    image_url = upload.json()["image_url"]
+    variants = wait_for_variants(image_url)
+    client.post("/api/posts", json={"content": "with a picture", "image_url": image_url}, headers=headers)
+
+    post = client.get("/api/posts", headers=headers).json()[0]
+
+    assert post["image_variants"] == variants
+    assert set(variants) == {"avatar", "thumb", "feed"}
+    for url in variants.values():
+        assert os.path.exists(url.replace("/uploads", main.UPLOAD_DIR))
+
+
+def test_images_outside_uploads_have_no_variants(db, client):
+    user = make_user(db, "alice")
+    headers = auth_headers(user)
+    client.post("/api/posts", json={"content": "hotlinked", "image_url": "https://example.com/a.png"}, headers=headers)
+
+    post = client.get("/api/posts", headers=headers).json()[0]
+
+    assert post["image_variants"] is None
+    assert client.get("/api/users/me", headers=headers).json()["profile_picture_variants"] is None
+
+
+def test_uploads_without_variants_are_not_looked_up_on_every_request(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path))
+    Image.new("RGB", (40, 40)).save(tmp_path / "post_1.png")
+    pipeline = main.ImageVariantPipeline(workers=1, cache_size=10, miss_ttl=60)
+    lookups = []
+    real_exists = os.path.exists
+    monkeypatch.setattr(main.os.path, "exists", lambda path: lookups.append(path) or real_exists(path))
+
+    assert pipeline.urls("/uploads/post_1.png") is None
+    assert pipeline.urls("/uploads/post_1.png") is None
+    assert len(lookups) == 1
+
+    # Written by another process: served from the miss until it expires or is forgotten
+    main.generate_variants(str(tmp_path / "post_1.png"))
+    assert pipeline.urls("/uploads/post_1.png") is None
+    pipeline.forget("/uploads/post_1.png")
+    assert set(pipeline.urls("/uploads/post_1.png")) == {"avatar", "thumb", "feed"}
+    assert pipeline.stats()["cached_missing"] == 0
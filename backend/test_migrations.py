@@ -0,0 +1,86 @@
+import os
+import shutil
+
+import pytest
+from sqlalchemy import inspect, text
+
+import main
+
+LEGACY_DB = os.path.join(main.BASE_DIR, "..", "sql_app.db")
+
+
+@pytest.fixture
+def scratch_engine(tmp_path):
+    engines = []
+
+    def make(source=None):
+        path = tmp_path / f"migrate_{len(engines)}.db"
+        if source:
+            shutil.copy(source, path)
+        bind = main.create_db_engine(f"sqlite:///{path}")
+        engines.append(bind)
+        return bind
+
+    yield make
+    for bind in engines:
+        bind.dispose()
+
+
+def test_fresh_database_reaches_the_model_schema(scratch_engine):
+    bind = scratch_engine()
+    assert main.pending_migrations(bind) == [(version, name) for version, name, _ in main.MIGRATIONS]
+
+    applied = main.run_migrations(bind, report=lambda message: None)
+
+    assert applied == [version for version, _, _ in main.MIGRATIONS]
+    assert main.pending_migrations(bind) == []
+    assert main.run_migrations(bind, report=lambda message: None) == []
+    tables = set(inspect(bind).get_table_names())
+    assert set(main.Base.metadata.tables) <= tables
+
+
+@pytest.mark.skipif(not os.path.exists(LEGACY_DB), reason="no pre-migration database checked in")
+def test_legacy_database_is_upgraded_in_batches(scratch_engine):
+    bind = scratch_engine(LEGACY_DB)
+    with bind.begin() as conn:
+        users_before = conn.execute(text("SELECT count(*) FROM users")).scalar()
+        like = conn.execute(text("SELECT owner_id, post_id FROM likes LIMIT 1")).one()
+        conn.execute(text("INSERT INTO likes (owner_id, post_id) VALUES (:owner, :post)"),
+                     {"owner": like.owner_id, "post": like.post_id})
+
+    messages = []
+    main.run_migrations(bind, batch_size=2, report=messages.append)
+
+    assert any("backfilled users.followers_count: 2/" in message for message in messages)
+    assert any("removed 1 duplicate row(s) from likes" in message for message in messages)
+    _, post_indexes = main.schema_objects(bind, "posts")
+    assert "ix_posts_published_created_at_id" in post_indexes
+    assert "uq_likes_post_owner" in main.schema_objects(bind, "likes")[1]
+
+    db = main.Session(bind=bind)
+    try:
+        assert db.query(main.User).count() == users_before
+        assert main.reconcile_counters(db, dry_run=True) == []
+        assert db.execute(text("SELECT count(*) FROM posts_fts")).scalar() == db.query(main.Post).count()
+        published = db.query(main.Post).filter(main.Post.is_published == True).count()
+        assert db.query(main.TimelineEntry).count() >= published
+    finally:
+        db.close()
+
+
+def test_interrupted_migration_is_rerun(scratch_engine, monkeypatch):
+    bind = scratch_engine()
+    calls = []
+
+    def failing_step(bind, batch_size, report):
+        calls.append(batch_size)
+        if len(calls) == 1:
+            raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(main, "MIGRATIONS", main.MIGRATIONS + [(999, "flaky", failing_step)])
+    with pytest.raises(RuntimeError):
+        main.run_migrations(bind, report=lambda message: None)
+    assert main.pending_migrations(bind) == [(999, "flaky")]
+
+    assert main.run_migrations(bind, report=lambda message: None) == [999]
+    assert len(calls) == 2
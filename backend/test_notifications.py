@@ -0,0 +1,226 @@
+import json
+from datetime import datetime, timedelta
+
+import anyio
+from anyio import to_thread
+
+import main
+from conftest import make_user, auth_headers
+
+
+def notifications(client, user):
+    main.notification_queue.flush()
+    response = client.get("/api/notifications", headers=auth_headers(user))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_notifications_are_written_by_the_queue_not_the_request(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    post_id = client.post("/api/posts", json={"content": "hi"}, headers=auth_headers(alice)).json()["id"]
+
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(bob))
+    client.post("/api/users/alice/follow", headers=auth_headers(bob))
+
+    assert db.query(main.Notification).count() == 0
+    assert main.notification_queue.stats()["pending"] == 2
+    assert {n["message"] for n in notifications(client, alice)} == {"bob liked your post", "bob started following you"}
+
+
+def test_repeat_likes_on_a_post_collapse_into_one_row(db, client):
+    alice = make_user(db, "alice")
+    fans = [make_user(db, f"fan{i}") for i in range(4)]
+    post_id = client.post("/api/posts", json={"content": "viral"}, headers=auth_headers(alice)).json()["id"]
+
+    for fan in fans[:3]:
+        client.post(f"/api/posts/{post_id}/like", headers=auth_headers(fan))
+    first = notifications(client, alice)
+    assert [(n["message"], n["actor_count"]) for n in first] == [("fan2 and 2 others liked your post", 3)]
+
+    client.put("/api/notifications/mark-all-read", headers=auth_headers(alice))
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(fans[3]))
+    client.post(f"/api/posts/{post_id}/comments", json={"text": "wow"}, headers=auth_headers(fans[0]))
+    after = {n["type"]: n for n in notifications(client, alice)}
+
+    assert db.query(main.Notification).count() == 2
+    assert after["like"]["id"] == first[0]["id"]
+    assert after["like"]["message"] == "fan3 and 3 others liked your post"
+    assert after["like"]["read"] is False
+    assert after["comment"]["message"] == "fan0 commented on your post"
+    assert main.reconcile_counters(db, dry_run=True) == []  # the revived like row counts as unread again
+
+
+def test_folded_rows_count_each_sender_once_across_flushes(db, client):
+    alice, bob, carol = (make_user(db, name) for name in ("alice", "bob", "carol"))
+    post_id = client.post("/api/posts", json={"content": "hi"}, headers=auth_headers(alice)).json()["id"]
+
+    for author in (bob, bob, carol, bob):
+        client.post(f"/api/posts/{post_id}/comments", json={"text": "again"}, headers=auth_headers(author))
+        main.notification_queue.flush()
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(bob))
+    main.notification_queue.flush()
+    client.delete(f"/api/posts/{post_id}/unlike", headers=auth_headers(bob))
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(bob))
+    rows = {n["type"]: n for n in notifications(client, alice)}
+
+    assert (rows["comment"]["message"], rows["comment"]["actor_count"]) == ("bob and 1 other commented on your post", 2)
+    assert (rows["like"]["message"], rows["like"]["actor_count"]) == ("bob liked your post", 1)
+
+    client.delete(f"/api/posts/{post_id}", headers=auth_headers(alice))
+    assert db.query(main.NotificationActor).count() == 0
+
+
+def test_events_for_deleted_posts_are_dropped(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    post_id = client.post("/api/posts", json={"content": "short-lived"}, headers=auth_headers(alice)).json()["id"]
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(bob))
+    client.delete(f"/api/posts/{post_id}", headers=auth_headers(alice))
+
+    assert main.notification_queue.flush() == 1
+    assert db.query(main.Notification).count() == 0
+
+
+def test_message_wording():
+    assert main.notification_message("like", "ann", 1) == "ann liked your post"
+    assert main.notification_message("like", "ann", 2) == "ann and 1 other liked your post"
+    assert main.notification_message("comment", "ann", 42) == "ann and 41 others commented on your post"
+
+
+def parse(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if not line.startswith(":"))
+    return fields.get("event"), json.loads(fields["data"]) if "data" in fields else None, fields.get("id")
+
+
+async def next_events(stream, count, timeout=5):
+    events = []
+    with anyio.fail_after(timeout):
+        while len(events) < count:
+            chunk = await stream.__anext__()
+            if chunk.startswith(("event", "id")):
+                events.append(parse(chunk))
+    return events
+
+
+def test_stream_pushes_new_notifications_and_unread_counts(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+
+    async def scenario():
+        stream = main.notification_events(alice.id)
+        try:
+            assert await next_events(stream, 1) == [("unread", {"unread_count": 0}, None)]
+            await to_thread.run_sync(lambda: client.post("/api/users/alice/follow", headers=auth_headers(bob)))
+            await to_thread.run_sync(main.notification_queue.flush)
+            (event, data, event_id), unread = await next_events(stream, 2)
+            assert (event, data["message"], data["sender_username"]) == ("notification", "bob started following you", "bob")
+            assert main.decode_cursor(event_id)[1] == data["id"]
+            assert unread == ("unread", {"unread_count": 1}, None)
+
+            await to_thread.run_sync(lambda: client.put("/api/notifications/mark-all-read", headers=auth_headers(alice)))
+            assert await next_events(stream, 1) == [("unread", {"unread_count": 0}, None)]
+        finally:
+            await stream.aclose()
+
+    anyio.run(scenario)
+    assert main.notification_hub.stats()["streams"] == 0
+
+
+def test_stream_sends_folded_and_inserted_rows_from_one_flush(db, client):
+    alice, bob, carol, dave = (make_user(db, name) for name in ("alice", "bob", "carol", "dave"))
+    post_id = client.post("/api/posts", json={"content": "hi"}, headers=auth_headers(alice)).json()["id"]
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(bob))
+    main.notification_queue.flush()
+
+    async def scenario():
+        stream = main.notification_events(alice.id)
+        try:
+            await next_events(stream, 1)
+            await to_thread.run_sync(lambda: client.post("/api/users/alice/follow", headers=auth_headers(carol)))
+            await to_thread.run_sync(lambda: client.post(f"/api/posts/{post_id}/like", headers=auth_headers(dave)))
+            await to_thread.run_sync(main.notification_queue.flush)  # one insert, one fold
+            events = await next_events(stream, 3)
+        finally:
+            await stream.aclose()
+        assert [data["message"] for _, data, _ in events[:2]] == [
+            "carol started following you", "dave and 1 other liked your post"
+        ]
+        assert events[2] == ("unread", {"unread_count": 2}, None)
+
+    anyio.run(scenario)
+
+
+def test_stream_resumes_after_the_last_seen_event(db, client):
+    alice = make_user(db, "alice")
+    start = datetime(2024, 1, 1)
+    for i in range(4):
+        db.add(main.Notification(recipient_id=alice.id, type="follow", message=f"note {i}", timestamp=start + timedelta(minutes=i)))
+    db.commit()
+    seen = db.query(main.Notification).filter(main.Notification.message == "note 1").one()
+    # A row folded in place after the client disconnected moves past the cursor
+    db.query(main.Notification).filter(main.Notification.message == "note 0").update({"timestamp": start + timedelta(hours=1)})
+    db.commit()
+    main.reconcile_counters(db)  # rows were inserted behind the queue's back
+
+    async def scenario():
+        stream = main.notification_events(alice.id, (seen.timestamp, seen.id))
+        try:
+            events = await next_events(stream, 5)
+        finally:
+            await stream.aclose()
+        assert [data["message"] for _, data, _ in events[1:4]] == ["note 2", "note 3", "note 0"]
+        assert events[4] == ("unread", {"unread_count": 4}, None)
+
+    anyio.run(scenario)
+
+
+def test_slow_stream_overflows_to_a_database_catch_up(db, client, monkeypatch):
+    monkeypatch.setattr(main, "notification_hub", main.NotificationHub(queue_size=2))
+    alice = make_user(db, "alice")
+    fans = [make_user(db, f"fan{i}") for i in range(5)]
+
+    async def scenario():
+        stream = main.notification_events(alice.id)
+        try:
+            await next_events(stream, 1)
+            for fan in fans:
+                await to_thread.run_sync(lambda: client.post("/api/users/alice/follow", headers=auth_headers(fan)))
+            await to_thread.run_sync(main.notification_queue.flush)
+            await anyio.sleep(0.1)
+            assert main.notification_hub.stats()["overflows"] > 0
+            events = await next_events(stream, 6)
+        finally:
+            await stream.aclose()
+        assert [data["message"] for event, data, _ in events if event == "notification"] == [
+            f"fan{i} started following you" for i in range(5)
+        ]
+        assert events[-1] == ("unread", {"unread_count": 5}, None)
+
+    anyio.run(scenario)
+
+
+def test_stream_requires_a_valid_token(db, client):
+    alice = make_user(db, "alice")
+    assert client.get("/api/notifications/stream").status_code == 401
+    assert client.get("/api/notifications/stream?token=nonsense").status_code == 401
+    token = client.post("/api/notifications/stream-token", headers=auth_headers(alice)).json()["token"]
+    assert client.get(f"/api/notifications/stream?token={token}&last_event_id=garbage").status_code == 400
+
+
+def test_stream_tokens_are_short_lived_and_single_purpose(db, client):
+    alice = make_user(db, "alice")
+    access_token = auth_headers(alice)["Authorization"].split()[1]
+    issued = client.post("/api/notifications/stream-token", headers=auth_headers(alice)).json()
+    expired = main.create_access_token(
+        data={"sub": "alice", "purpose": main.STREAM_TOKEN_PURPOSE}, expires_delta=main.timedelta(seconds=-1)
+    )
+
+    assert issued["expires_in"] == main.STREAM_TOKEN_EXPIRE_SECONDS
+    # The long-lived access token stays out of URLs, and the stream token is not a login
+    assert client.get(f"/api/notifications/stream?token={access_token}").status_code == 401
+    assert client.get(f"/api/notifications/stream?token={expired}&last_event_id=garbage").status_code == 401
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {issued['token']}"}).status_code == 401
+    assert client.get(
+        "/api/notifications/stream?last_event_id=garbage", headers=auth_headers(alice)
+    ).status_code == 400
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import main
+from conftest import make_user, auth_headers
+
+
+def seed_posts(db, owner, count, same_timestamp=False):
+    base = datetime(2024, 1, 1)
+    for i in range(count):
+        created_at = base if same_timestamp else base + timedelta(minutes=i)
+        db.add(main.Post(title=f"post {i}", content="c", owner_id=owner.id, created_at=created_at))
+    db.commit()
+    main.rebuild_timelines(db)
+
+
+def walk(client, url, headers):
+    titles, cursor = [], None
+    while True:
+        page_url = f"{url}&cursor={cursor}" if cursor else url
+        response = client.get(page_url, headers=headers)
+        assert response.status_code == 200
+        titles.extend(item.get("title") or item.get("text") or item["message"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return titles
+
+
+def test_cursor_walks_every_post_once_in_order(db, client):
+    alice = make_user(db, "alice")
+    seed_posts(db, alice, 7)
+    titles = walk(client, "/api/posts?limit=3", auth_headers(alice))
+    assert titles == [f"post {i}" for i in reversed(range(7))]
+
+
+def test_cursor_breaks_timestamp_ties_by_id(db, client):
+    alice = make_user(db, "alice")
+    seed_posts(db, alice, 5, same_timestamp=True)
+    for url in ("/api/feed?limit=2", "/api/users/alice/posts?limit=2"):
+        titles = walk(client, url, auth_headers(alice))
+        assert titles == [f"post {i}" for i in reversed(range(5))]
+
+
+def test_cursor_is_stable_when_new_posts_arrive(db, client):
+    alice = make_user(db, "alice")
+    seed_posts(db, alice, 4)
+    first = client.get("/api/posts?limit=2", headers=auth_headers(alice))
+    db.add(main.Post(title="newest", content="c", owner_id=alice.id, created_at=datetime(2025, 1, 1)))
+    db.commit()
+    second = client.get(f"/api/posts?limit=2&cursor={first.headers['X-Next-Cursor']}", headers=auth_headers(alice))
+    assert [p["title"] for p in second.json()] == ["post 1", "post 0"]
+
+
+def test_comment_and_notification_cursors(db, client):
+    alice = make_user(db, "alice")
+    post = main.Post(content="c", owner_id=alice.id)
+    db.add(post)
+    db.flush()
+    for i in range(5):
+        db.add(main.Comment(text=f"comment {i}", owner_id=alice.id, post_id=post.id,
+                            created_at=datetime(2024, 1, 1) + timedelta(minutes=i)))
+        db.add(main.Notification(recipient_id=alice.id, type="like", message=f"note {i}",
+                                 timestamp=datetime(2024, 1, 1) + timedelta(minutes=i)))
+    db.commit()
+    headers = auth_headers(alice)
+    assert walk(client, f"/api/posts/{post.id}/comments?limit=2", headers) == [f"comment {i}" for i in range(5)]
+    assert walk(client, "/api/notifications?limit=2", headers) == [f"note {i}" for i in reversed(range(5))]
+
+
+def test_invalid_cursor_is_rejected(db, client):
+    alice = make_user(db, "alice")
+    assert client.get("/api/posts?cursor=garbage", headers=auth_headers(alice)).status_code == 400
+
+
+def test_skip_still_supported(db, client):
+    alice = make_user(db, "alice")
+    seed_posts(db, alice, 4)
+    response = client.get("/api/posts?skip=2&limit=5", headers=auth_headers(alice))
+    assert [p["title"] for p in response.json()] == ["post 1", "post 0"]
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import main
+from conftest import make_user, auth_headers
+
+
+def test_saturated_pool_rejects_fast_and_reports_queue_depth():
+    pool = main.PasswordHasherPool(workers=1, max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(pool.run(slow))) for _ in range(2)]
+    for caller in callers:
+        caller.start()
+    started.wait(5)
+    deadline = time.monotonic() + 5
+    while pool.stats()["queue_depth"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    with pytest.raises(HTTPException) as exc_info:
+        pool.run(lambda: "rejected")
+    assert exc_info.value.status_code == 503
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    for caller in callers:
+        caller.join(5)
+    assert results == ["done", "done"]
+    assert pool.stats()["queue_depth"] == 0
+    assert pool.run(lambda: "ok") == "ok"
+
+
+def test_register_and_login_hash_through_pool(db, client):
+    before = main.password_hasher.stats()["completed"]
+    response = client.post("/api/register", json={
+        "username": "alice", "email": "alice@example.com", "password": "secret123"
+    })
+    assert response.status_code == 200
+    response = client.post("/api/login", data={"username": "alice", "password": "secret123"})
+    assert response.status_code == 200
+    assert main.password_hasher.stats()["completed"] == before + 2
+
+
+def test_metrics_expose_hash_queue_depth(db, client):
+    admin = make_user(db, "admin")
+    admin.is_master = True
+    db.commit()
+    metrics = client.get("/api/admin/metrics", headers=auth_headers(admin)).json()
+    assert metrics["password_hashing"]["queue_depth"] == 0
+
+
+def test_waiting_callers_are_capped_to_a_share_of_request_threads():
+    pool = main.PasswordHasherPool(workers=4, max_queue=16, request_threads=32)
+
+    stats = pool.stats()
+    assert stats["max_request_threads"] == 8
+    assert (stats["workers"], stats["max_queue"]) == (4, 4)
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+import main
+from conftest import make_user, auth_headers
+
+
+def make_master(db, username="admin"):
+    user = make_user(db, username)
+    user.is_master = True
+    db.commit()
+    return user
+
+
+def backdate(db, row, column, days):
+    setattr(row, column, getattr(row, column) - timedelta(days=days))
+    db.commit()
+
+
+def test_rollup_counts_each_day_from_the_source_rows(db):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    carol = make_user(db, "carol")
+    carol.is_active = False
+    backdate(db, alice, "joined_date", 3)
+    old_post = main.Post(title="t", content="old", owner_id=alice.id)
+    post = main.Post(title="t", content="new", owner_id=alice.id)
+    draft = main.Post(title="t", content="draft", owner_id=carol.id, is_published=False)
+    db.add_all([old_post, post, draft])
+    db.commit()
+    backdate(db, old_post, "created_at", 3)
+    db.add_all([
+        main.Like(owner_id=bob.id, post_id=post.id),
+        main.Like(owner_id=alice.id, post_id=post.id),
+        main.Comment(text="hi", owner_id=bob.id, post_id=post.id),
+    ])
+    db.commit()
+
+    today = main.datetime.now(main.timezone.utc).date()
+    days = main.platform_stats_rollup.run(days=4, today=today)
+
+    assert days == [today - timedelta(days=offset) for offset in (3, 2, 1, 0)]
+    rows = {row.day: row for row in db.query(main.PlatformDailyStats)}
+    earlier, latest = rows[today - timedelta(days=3)], rows[today]
+    assert (earlier.signups, earlier.posts, earlier.active_users, earlier.total_users) == (1, 1, 1, 1)
+    assert (latest.signups, latest.posts, latest.likes, latest.comments) == (2, 1, 2, 1)
+    assert latest.active_users == 2  # alice posted and liked, bob liked and commented
+    assert (latest.total_users, latest.active_accounts, latest.total_posts) == (3, 2, 2)
+    assert rows[today - timedelta(days=1)].total_users == 1
+
+
+def test_dashboards_read_the_rollup_for_a_range(db, client):
+    admin = make_master(db)
+    user = make_user(db, "alice")
+    backdate(db, user, "joined_date", 10)
+    db.add(main.Post(title="t", content="c", owner_id=user.id))
+    db.commit()
+    main.platform_stats_rollup.run(days=30)
+
+    stats = client.get("/api/admin/stats?days=7", headers=auth_headers(admin)).json()
+
+    assert (stats["total_users"], stats["total_posts"], stats["new_users_month"]) == (2, 1, 2)
+    assert stats["range"]["days"] == 7
+    assert stats["range"]["signups"] == 1  # alice joined before the 7-day window
+    assert [day["day"] for day in stats["daily"]][-1] == main.datetime.now(main.timezone.utc).date().isoformat()
+
+    # Later writes show up once the job runs again
+    make_user(db, "bob")
+    assert client.get("/api/admin/stats", headers=auth_headers(admin)).json()["total_users"] == 2
+    main.platform_stats_rollup.run()
+    vice = client.get("/api/vice-admin/stats?days=90", headers=auth_headers(admin)).json()
+    assert (vice["active_users"], vice["total_posts"], vice["range"]["signups"]) == (3, 1, 3)
+
+
+def test_unknown_range_is_rejected(db, client):
+    admin = make_master(db)
+
+    response = client.get("/api/admin/stats?days=14", headers=auth_headers(admin))
+
+    assert response.status_code == 400
+
+
+def test_days_missed_while_down_are_rolled_up_by_the_next_run(db, client):
+    admin = make_master(db)
+    today = main.datetime.now(main.timezone.utc).date()
+    main.platform_stats_rollup.run(days=1, today=today - timedelta(days=10))  # last run before the outage
+    post = main.Post(title="t", content="during the outage", owner_id=admin.id)
+    db.add(post)
+    db.commit()
+    backdate(db, post, "created_at", 5)
+
+    stats = client.get("/api/admin/stats?days=30", headers=auth_headers(admin)).json()
+
+    stored = [row.day for row in db.query(main.PlatformDailyStats).order_by(main.PlatformDailyStats.day)]
+    assert stored == [today - timedelta(days=offset) for offset in range(10, -1, -1)]
+    assert stats["range"]["posts"] == 1
+    assert {day["day"]: day["posts"] for day in stats["daily"]}[(today - timedelta(days=5)).isoformat()] == 1
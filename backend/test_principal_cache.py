@@ -0,0 +1,69 @@
+from conftest import make_user, auth_headers
+from test_hydration import QueryCounter
+
+import main
+
+
+def test_cached_principal_skips_decode_and_lookup(db, client, monkeypatch):
+    alice = make_user(db, "alice")
+    headers = auth_headers(alice)
+    assert client.get("/api/notifications/unread-count", headers=headers).status_code == 200
+    hits_before = main.principal_cache.stats()["hits"]
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token decoded again")
+
+    monkeypatch.setattr(main.jwt, "decode", fail_decode)
+    with QueryCounter(main.engine) as counter:
+        assert client.get("/api/notifications/unread-count", headers=headers).status_code == 200
+    assert counter.count == 1  # only the stored unread counter
+    assert main.principal_cache.stats()["hits"] == hits_before + 1
+
+
+def test_profile_update_and_role_change_evict_principal(db, client):
+    alice = make_user(db, "alice")
+    admin = make_user(db, "admin")
+    admin.is_master = True
+    db.commit()
+    headers = auth_headers(alice)
+
+    client.get("/api/users/me", headers=headers)
+    client.put("/api/users/me", json={"full_name": "Alice A."}, headers=headers)
+    assert client.get("/api/users/me", headers=headers).json()["full_name"] == "Alice A."
+
+    client.put(f"/api/admin/users/{alice.id}/role", json={"role": "vice_admin"}, headers=auth_headers(admin))
+    assert client.get("/api/vice-admin/content-reports", headers=headers).status_code == 200
+    assert client.get("/api/users/me", headers=headers).json()["is_vice_admin"] is True
+
+
+def test_deactivation_takes_effect_immediately(db, client):
+    alice = make_user(db, "alice")
+    headers = auth_headers(alice)
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+
+    alice.is_active = False
+    db.commit()
+    assert client.get("/api/users/me", headers=headers).status_code == 400
+
+
+def test_profile_picture_upload_evicts_principal(db, client):
+    alice = make_user(db, "alice")
+    headers = auth_headers(alice)
+    client.get("/api/users/me", headers=headers)
+    response = client.post(
+        "/api/users/me/upload-profile-picture",
+        files={"file": ("me.png", b"\x89PNG\r\n\x1a\n" + b"0" * 16, "image/png")},
+        headers=headers
+    )
+    assert response.status_code == 200
+    me = client.get("/api/users/me", headers=headers).json()
+    assert me["profile_picture"] == response.json()["profile_picture"]
+
+
+def test_counters_are_fresh_despite_cached_principal(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    client.get("/api/users/me", headers=auth_headers(alice))
+    client.post("/api/users/alice/follow", headers=auth_headers(bob))
+    assert client.get("/api/users/me", headers=auth_headers(alice)).json()["followers_count"] == 1
+    assert client.get("/api/stats/overview", headers=auth_headers(alice)).json()["total_followers"] == 1
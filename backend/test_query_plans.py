@@ -0,0 +1,143 @@
+"""Run EXPLAIN QUERY PLAN on every statement each endpoint issues and fail on full table scans."""
+import re
+
+import pytest
+from sqlalchemy import event
+
+import main
+from conftest import make_user, auth_headers
+
+# Endpoints whose job is to read a whole table. Anything listed here should
+# shrink over time, never grow.
+ALLOWED_SCANS = {
+    ("GET", "/api/admin/users/export"): {"users"},
+}
+
+TABLES = set(main.Base.metadata.tables)
+SCAN = re.compile(r"^SCAN (\w+)(.*)$")
+
+
+def full_scans(plan_rows):
+    scans = set()
+    for row in plan_rows:
+        match = SCAN.match(row[-1])
+        if not match:
+            continue
+        table, rest = match.groups()
+        if table in TABLES and "INDEX" not in rest:
+            scans.add(table)
+    return scans
+
+
+@pytest.fixture
+def seeded(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    admin = make_user(db, "admin")
+    admin.is_master = True
+    bob.is_vice_admin = True
+    db.commit()
+    client.post("/api/users/alice/follow", headers=auth_headers(bob))
+    client.post("/api/users/bob/follow", headers=auth_headers(alice))
+    post_id = client.post("/api/posts", json={"title": "hello world", "content": "first"}, headers=auth_headers(alice)).json()["id"]
+    client.post("/api/posts", json={"title": "second", "content": "more"}, headers=auth_headers(bob))
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers(bob))
+    comment_id = client.post(f"/api/posts/{post_id}/comments", json={"text": "nice"}, headers=auth_headers(bob)).json()["id"]
+    client.post(f"/api/posts/{post_id}/comments", json={"text": "thanks", "parent_id": comment_id}, headers=auth_headers(alice))
+    client.post(f"/api/comments/{comment_id}/like", headers=auth_headers(alice))
+    return {"alice": alice, "bob": bob, "admin": admin, "post_id": post_id, "comment_id": comment_id}
+
+
+def endpoint_calls(s):
+    post_id, comment_id = s["post_id"], s["comment_id"]
+    return [
+        ("GET", "/api/users/me", "alice", None),
+        ("GET", "/api/users/bob", "alice", None),
+        ("PUT", "/api/users/me", "alice", {"bio": "hi"}),
+        ("GET", "/api/users/alice/followers", "alice", None),
+        ("GET", "/api/users/alice/following", "alice", None),
+        ("GET", "/api/posts", "alice", None),
+        ("GET", f"/api/posts/{post_id}", "alice", None),
+        ("GET", "/api/users/alice/posts", "bob", None),
+        ("PUT", f"/api/posts/{post_id}", "alice", {"content": "edited"}),
+        ("GET", "/api/feed", "bob", None),
+        ("GET", f"/api/posts/{post_id}/comments", "alice", None),
+        ("GET", "/api/notifications", "alice", None),
+        ("GET", "/api/notifications?unread_only=true", "alice", None),
+        ("GET", "/api/notifications/unread-count", "alice", None),
+        ("PUT", "/api/notifications/mark-all-read", "alice", None),
+        ("GET", "/api/search/posts?q=hello", "alice", None),
+        ("GET", "/api/search/users?q=bob", "alice", None),
+        ("GET", "/api/stats/overview", "alice", None),
+        ("POST", f"/api/posts/{post_id}/like", "alice", None),
+        ("DELETE", f"/api/posts/{post_id}/unlike", "alice", None),
+        ("POST", f"/api/comments/{comment_id}/like", "bob", None),
+        ("DELETE", f"/api/comments/{comment_id}/unlike", "bob", None),
+        ("DELETE", "/api/users/alice/unfollow", "bob", None),
+        ("POST", "/api/users/alice/follow", "bob", None),
+        ("POST", "/api/posts", "alice", {"content": "new"}),
+        ("POST", f"/api/posts/{post_id}/comments", "bob", {"text": "again"}),
+        ("DELETE", f"/api/comments/{comment_id}", "bob", None),
+        ("GET", "/api/admin/users", "admin", None),
+        ("GET", "/api/admin/users?role=member&q=ali&limit=1", "admin", None),
+        ("GET", "/api/admin/users/summary", "admin", None),
+        ("GET", "/api/admin/users/export?format=csv", "admin", None),
+        ("GET", "/api/admin/stats", "admin", None),
+        ("GET", "/api/admin/vice-admins", "admin", None),
+        ("PUT", f"/api/admin/users/{s['bob'].id}/role", "admin", {"role": "guide"}),
+        ("POST", "/api/admin/create-vice-admin", "admin", {"username": "vice", "email": "vice@example.com", "password": "secret1"}),
+        ("GET", "/api/vice-admin/stats", "bob", None),
+        ("DELETE", f"/api/posts/{post_id}", "alice", None),
+    ]
+
+
+def test_no_endpoint_query_falls_back_to_a_full_scan(seeded, client):
+    violations = []
+    for method, url, who, body in endpoint_calls(seeded):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "INSERT")):
+                statements.append((statement, parameters))
+
+        event.listen(main.engine, "before_cursor_execute", capture)
+        try:
+            response = client.request(method, url, json=body, headers=auth_headers(seeded[who]))
+            main.notification_queue.flush()  # count the queued notification writes against the endpoint
+        finally:
+            event.remove(main.engine, "before_cursor_execute", capture)
+        assert response.status_code < 400, (method, url, response.text)
+
+        allowed = ALLOWED_SCANS.get((method, url.split("?")[0]), set())
+        raw = main.engine.raw_connection()
+        try:
+            for statement, parameters in statements:
+                plan = raw.cursor().execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                scanned = full_scans(plan) - allowed
+                if scanned:
+                    violations.append(f"{method} {url}: full scan of {sorted(scanned)} in\n    {statement}")
+        finally:
+            raw.close()
+
+    assert not violations, "\n".join(violations)
+
+
+def test_unique_constraints_reject_duplicate_edges(db):
+    from sqlalchemy.exc import IntegrityError
+
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    post = main.Post(title="t", content="c", owner_id=alice.id)
+    db.add(post)
+    db.commit()
+
+    for make in (
+        lambda: main.Like(owner_id=bob.id, post_id=post.id),
+        lambda: main.Follow(follower_id=bob.id, followed_id=alice.id),
+    ):
+        db.add(make())
+        db.commit()
+        db.add(make())
+        with pytest.raises(IntegrityError):
+            db.commit()
+        db.rollback()
@@ -0,0 +1,59 @@
+import main
+from conftest import make_user, auth_headers
+
+
+def search_posts(client, user, q):
+    response = client.get("/api/search/posts", params={"q": q}, headers=auth_headers(user))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_post_search_is_ranked_and_highlighted(db, client):
+    alice = make_user(db, "alice")
+    headers = auth_headers(alice)
+    client.post("/api/posts", json={"title": "Morning routine", "content": "tea and a walk"}, headers=headers)
+    client.post("/api/posts", json={"title": "Meditation", "content": "breathing <b>meditation</b> for beginners"}, headers=headers)
+    client.post("/api/posts", json={"title": "Journal", "content": "a note on medit-ation"}, headers=headers)
+
+    results = search_posts(client, alice, "medit")
+    assert [r["title"] for r in results][:2] == ["Meditation", "Journal"]
+    assert results[0]["snippet"] == "<mark>Meditation</mark>"
+    assert search_posts(client, alice, "beginners")[0]["snippet"] == (
+        "breathing &lt;b&gt;meditation&lt;/b&gt; for <mark>beginners</mark>"
+    )
+    assert search_posts(client, alice, "  !! ") == []
+
+
+def test_post_index_follows_updates_and_deletes(db, client):
+    alice = make_user(db, "alice")
+    headers = auth_headers(alice)
+    post_id = client.post("/api/posts", json={"title": "Sunrise", "content": "c"}, headers=headers).json()["id"]
+
+    client.put(f"/api/posts/{post_id}", json={"title": "Sunset"}, headers=headers)
+    assert search_posts(client, alice, "sunrise") == []
+    assert [r["id"] for r in search_posts(client, alice, "sunset")] == [post_id]
+
+    client.delete(f"/api/posts/{post_id}", headers=headers)
+    assert search_posts(client, alice, "sunset") == []
+
+
+def test_user_search(db, client):
+    alice = make_user(db, "alice")
+    make_user(db, "bob")
+    client.put("/api/users/me", json={"bio": "Yoga teacher", "full_name": "Alice Wonder"}, headers=auth_headers(alice))
+
+    results = client.get("/api/search/users", params={"q": "yoga"}).json()
+    assert [r["username"] for r in results] == ["alice"]
+    assert results[0]["snippet"] == "<mark>Yoga</mark> teacher"
+
+
+def test_rebuild_search_index(db, client):
+    alice = make_user(db, "alice")
+    db.add(main.Post(title="Imported", content="c", owner_id=alice.id))
+    db.commit()
+    db.execute(main.text("DELETE FROM posts_fts"))
+    db.commit()
+    assert search_posts(client, alice, "imported") == []
+
+    main.rebuild_search_index(db)
+    assert [r["title"] for r in search_posts(client, alice, "imported")] == ["Imported"]
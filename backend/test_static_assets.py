@@ -0,0 +1,91 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main
+
+CSS = b"body { color: black; }\n" * 50
+
+
+@pytest.fixture
+def site(tmp_path):
+    source = tmp_path / "site"
+    (source / "css").mkdir(parents=True)
+    (source / "js").mkdir()
+    (source / "pages").mkdir()
+    (source / "data").mkdir()
+    (source / "css" / "main.css").write_bytes(CSS)
+    (source / "js" / "auth.js").write_text("console.log('hi');\n" * 50)
+    (source / "index.html").write_text('<link href="css/main.css"><script src="js/auth.js?v=2"></script>')
+    (source / "pages" / "about.html").write_text(
+        '<link href="../css/main.css"><a href="settings.html"></a><img src="https://example.com/x.png">'
+    )
+    (source / "data" / "wisdom.json").write_text('{"quotes": []}')
+    build = tmp_path / "dist"
+    manifest = main.build_assets(str(source), str(build))
+
+    app = FastAPI()
+    for name in ("css", "js", "pages", "data"):
+        app.mount(f"/{name}", main.AssetFiles(name, source_dir=str(source), build_dir=str(build)))
+    return TestClient(app), manifest, build
+
+
+def test_build_fingerprints_and_rewrites_references(site):
+    _, manifest, build = site
+
+    hashed_css = manifest["css/main.css"]
+    assert hashed_css.startswith("css/main.") and hashed_css.endswith(".css")
+    assert json.loads((build / "manifest.json").read_text()) == manifest
+    assert gzip.decompress((build / f"{hashed_css}.gz").read_bytes()) == CSS
+    index = (build / "index.html").read_text()
+    assert f'href="{hashed_css}"' in index
+    assert f'src="{manifest["js/auth.js"]}?v=2"' in index
+    about = (build / "pages" / "about.html").read_text()
+    assert f'href="../{hashed_css}"' in about
+    assert 'href="settings.html"' in about and "https://example.com/x.png" in about
+
+
+def test_hashed_assets_are_immutable_and_precompressed(site):
+    client, manifest, _ = site
+    url = "/" + manifest["css/main.css"]
+
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+
+    assert compressed.headers["cache-control"] == main.IMMUTABLE_CACHE_CONTROL
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["content-type"].startswith("text/css")
+    assert int(compressed.headers["content-length"]) < len(CSS)
+    assert compressed.content == CSS  # the client decodes it
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+
+@pytest.mark.skipif(main.brotli is None, reason="brotli not installed")
+def test_brotli_preferred_when_accepted(site):
+    client, manifest, _ = site
+
+    response = client.get("/" + manifest["js/auth.js"], headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+
+
+def test_unhashed_names_and_data_revalidate(site):
+    client, _, _ = site
+
+    for url in ("/css/main.css", "/pages/about.html", "/data/wisdom.json"):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == main.REVALIDATE_CACHE_CONTROL
+    etag = client.get("/data/wisdom.json").headers["etag"]
+    assert client.get("/data/wisdom.json", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/css/missing.css").status_code == 404
+
+
+def test_refused_encodings_are_not_served():
+    assert main.accepted_encodings("gzip;q=0, br") == {"br"}
+    assert main.accepted_encodings("") == set()
+    assert main.accepted_encodings("gzip;q=oops, br;q=0.5") == {"br"}
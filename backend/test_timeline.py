@@ -0,0 +1,123 @@
+import main
+from conftest import make_user, auth_headers
+
+
+def feed_titles(client, user, query="limit=20"):
+    response = client.get(f"/api/feed?{query}", headers=auth_headers(user))
+    assert response.status_code == 200
+    return [post["title"] for post in response.json()]
+
+
+def create_post(client, user, title):
+    response = client.post("/api/posts", json={"title": title, "content": "c"}, headers=auth_headers(user))
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def test_create_post_fans_out_to_followers(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    client.post("/api/users/alice/follow", headers=auth_headers(bob))
+
+    post_id = create_post(client, alice, "hello")
+    entries = db.query(main.TimelineEntry.user_id).filter(main.TimelineEntry.post_id == post_id).all()
+    assert sorted(row[0] for row in entries) == sorted([alice.id, bob.id])
+    assert feed_titles(client, bob) == ["hello"]
+
+
+def test_follow_backfills_and_unfollow_prunes(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    create_post(client, alice, "first")
+    create_post(client, alice, "second")
+    create_post(client, bob, "mine")
+
+    client.post("/api/users/alice/follow", headers=auth_headers(bob))
+    assert feed_titles(client, bob) == ["mine", "second", "first"]
+
+    client.delete("/api/users/alice/unfollow", headers=auth_headers(bob))
+    assert feed_titles(client, bob) == ["mine"]
+
+
+def test_delete_post_removes_timeline_entries(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    client.post("/api/users/alice/follow", headers=auth_headers(bob))
+    post_id = create_post(client, alice, "gone")
+    client.delete(f"/api/posts/{post_id}", headers=auth_headers(alice))
+    assert db.query(main.TimelineEntry).filter(main.TimelineEntry.post_id == post_id).count() == 0
+    assert feed_titles(client, bob) == []
+
+
+def test_large_accounts_are_pulled_and_merged(db, client, monkeypatch):
+    monkeypatch.setattr(main, "FEED_FANOUT_MAX_FOLLOWERS", 1)
+    star = make_user(db, "star")
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    client.post("/api/users/star/follow", headers=auth_headers(alice))
+    client.post("/api/users/star/follow", headers=auth_headers(bob))
+    client.post("/api/users/alice/follow", headers=auth_headers(bob))
+
+    create_post(client, star, "star 1")
+    create_post(client, alice, "alice 1")
+    create_post(client, star, "star 2")
+
+    # star has two followers, so their posts are not written to bob's timeline
+    assert db.query(main.TimelineEntry).filter(
+        main.TimelineEntry.user_id == bob.id, main.TimelineEntry.author_id == star.id
+    ).count() == 0
+    assert feed_titles(client, bob) == ["star 2", "alice 1", "star 1"]
+
+    first = client.get("/api/feed?limit=2", headers=auth_headers(bob))
+    cursor = first.headers["X-Next-Cursor"]
+    assert feed_titles(client, bob, f"limit=2&cursor={cursor}") == ["star 1"]
+    assert feed_titles(client, bob, "limit=2&skip=1") == ["alice 1", "star 1"]
+
+
+def test_fan_out_reads_the_stored_follower_count(db, client, monkeypatch):
+    monkeypatch.setattr(main, "FEED_FANOUT_MAX_FOLLOWERS", 1)
+    star = make_user(db, "star")
+    bob = make_user(db, "bob")
+    client.post("/api/users/star/follow", headers=auth_headers(bob))
+    stale = main.User(id=star.id, username="star", followers_count=5)  # e.g. a cached principal
+    post = main.Post(title="fresh", content="c", owner_id=star.id)
+    db.add(post)
+    db.flush()
+
+    main.fan_out_post(db, post, stale)
+    db.commit()
+
+    assert feed_titles(client, bob) == ["fresh"]
+
+
+def test_author_back_under_the_limit_is_backfilled_before_pulling_stops(db, client, monkeypatch):
+    monkeypatch.setattr(main, "FEED_FANOUT_MAX_FOLLOWERS", 1)
+    star = make_user(db, "star")
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    client.post("/api/users/star/follow", headers=auth_headers(alice))
+    client.post("/api/users/star/follow", headers=auth_headers(bob))
+    create_post(client, star, "while big")
+
+    client.delete("/api/users/star/unfollow", headers=auth_headers(alice))
+    main.timeline_backfiller.drain()
+
+    db.expire_all()
+    assert star.feed_pull is False
+    assert db.query(main.TimelineEntry).filter(
+        main.TimelineEntry.user_id == bob.id, main.TimelineEntry.author_id == star.id
+    ).count() == 1
+    create_post(client, star, "small again")
+    assert feed_titles(client, bob) == ["small again", "while big"]
+
+
+def test_rebuild_timelines(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    db.add(main.Follow(follower_id=bob.id, followed_id=alice.id))
+    db.add(main.Post(title="seeded", content="c", owner_id=alice.id))
+    db.commit()
+    main.reconcile_counters(db)
+
+    assert main.rebuild_timelines(db) == 2
+    assert feed_titles(client, bob) == ["seeded"]
@@ -0,0 +1,112 @@
+import os
+import time
+
+import pytest
+
+import main
+from conftest import make_user, auth_headers
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 1000
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    root = tmp_path / "uploads"
+    (root / "tmp").mkdir(parents=True)
+    (root / "posts").mkdir()
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(root))
+    return root
+
+
+def upload(client, user, content):
+    response = client.post("/api/upload/image", files={"file": ("a.png", content, "image/png")}, headers=auth_headers(user))
+    return response.json()["image_url"]
+
+
+def age(db, url, seconds=7200):
+    """Backdate an upload's files and blob row as if it had been stored `seconds` ago."""
+    past = time.time() - seconds
+    for path in main.upload_files(url):
+        os.utime(path, (past, past))
+    db.query(main.UploadBlob).filter(main.UploadBlob.url == url).update(
+        {main.UploadBlob.last_uploaded_at: main.datetime.fromtimestamp(past, main.timezone.utc)}
+    )
+    db.commit()
+
+
+def test_sweeps_only_old_unreferenced_uploads(db, client, upload_dir):
+    user = make_user(db, "alice")
+    kept = upload(client, user, PNG + b"kept")
+    client.post("/api/posts", json={"content": "uses it", "image_url": kept}, headers=auth_headers(user))
+    abandoned = upload(client, user, PNG + b"abandoned")
+    fresh = upload(client, user, PNG + b"fresh")
+    legacy = upload_dir / "posts" / "post_1_123.png"
+    legacy.write_bytes(PNG)
+    stale_part = upload_dir / "tmp" / "dead.part"
+    stale_part.write_bytes(b"x" * 10)
+    for url in (kept, abandoned, "/uploads/posts/post_1_123.png", "/uploads/tmp/dead.part"):
+        age(db, url)
+
+    report = main.upload_collector.run(batch_size=2)
+
+    assert report["scanned"] == 5
+    assert report["orphaned"] == 3
+    assert report["bytes_reclaimed"] == len(PNG + b"abandoned") + len(PNG) + 10
+    assert os.path.exists(main.upload_path(kept))
+    assert os.path.exists(main.upload_path(fresh))
+    assert not os.path.exists(main.upload_path(abandoned))
+    assert not legacy.exists() and not stale_part.exists()
+    assert {blob.url for blob in db.query(main.UploadBlob)} == {kept, fresh}
+
+
+def test_dry_run_and_quarantine(db, client, tmp_path):
+    user = make_user(db, "alice")
+    abandoned = upload(client, user, PNG)
+    age(db, abandoned)
+
+    preview = main.upload_collector.run(dry_run=True)
+    assert preview["orphaned"] == 1 and preview["action"] == "dry-run"
+    assert os.path.exists(main.upload_path(abandoned))
+
+    quarantine = tmp_path / "quarantine"
+    report = main.upload_collector.run(quarantine_dir=str(quarantine))
+
+    assert report["action"] == "quarantined"
+    assert not os.path.exists(main.upload_path(abandoned))
+    moved = quarantine / abandoned[len("/uploads/"):]
+    assert moved.read_bytes() == PNG
+
+
+def test_reupload_restarts_the_grace_period(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    url = upload(client, alice, PNG)
+    age(db, url)
+
+    assert upload(client, bob, PNG) == url
+    report = main.upload_collector.run()
+
+    assert report["orphaned"] == 0
+    assert os.path.exists(main.upload_path(url))
+
+
+def test_quarantine_inside_uploads_is_refused(upload_dir):
+    with pytest.raises(ValueError):
+        main.upload_collector.run(quarantine_dir=str(upload_dir / "posts" / "quarantine"))
+
+
+def test_files_stay_when_the_row_deletion_fails_to_commit(db, client, monkeypatch):
+    user = make_user(db, "alice")
+    abandoned = upload(client, user, PNG)
+    age(db, abandoned)
+
+    def failing_commit(session):
+        raise RuntimeError("database is locked")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(main.Session, "commit", failing_commit)
+        with pytest.raises(RuntimeError):
+            main.upload_collector.run()
+
+    assert os.path.exists(main.upload_path(abandoned))
+    assert db.query(main.UploadBlob).count() == 1
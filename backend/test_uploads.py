@@ -0,0 +1,172 @@
+import hashlib
+import os
+
+import main
+from conftest import make_user, auth_headers
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 200_000
+
+
+def stored_files():
+    found = []
+    for subdir in ("tmp", "blobs"):
+        for directory, _, file_names in os.walk(os.path.join(main.UPLOAD_DIR, subdir)):
+            found += [os.path.join(directory, name) for name in file_names]
+    return sorted(found)
+
+
+def test_image_upload_streams_to_disk_with_checksum(db, client):
+    user = make_user(db, "alice")
+
+    response = client.post(
+        "/api/upload/image",
+        files={"file": ("photo.exe", PNG, "application/octet-stream")},
+        headers=auth_headers(user),
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["image_url"].endswith(".png")  # extension comes from the magic bytes
+    assert body["size"] == len(PNG)
+    assert body["sha256"] == hashlib.sha256(PNG).hexdigest()
+    with open(body["image_url"].replace("/uploads", main.UPLOAD_DIR), "rb") as stored:
+        assert stored.read() == PNG
+
+
+def test_upload_rejects_non_images_despite_content_type(db, client):
+    user = make_user(db, "alice")
+    before = stored_files()
+
+    response = client.post(
+        "/api/upload/image",
+        files={"file": ("evil.png", b"<?php echo 1; ?>", "image/png")},
+        headers=auth_headers(user),
+    )
+
+    assert response.status_code == 400
+    assert stored_files() == before
+
+
+def test_upload_over_limit_is_aborted_and_cleaned_up(db, client, monkeypatch):
+    user = make_user(db, "alice")
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 100_000)
+    monkeypatch.setattr(main, "UPLOAD_FORM_OVERHEAD", 1_000_000)  # let the body through to the stream check
+    before = stored_files()
+
+    response = client.post(
+        "/api/upload/image",
+        files={"file": ("big.png", PNG, "image/png")},
+        headers=auth_headers(user),
+    )
+
+    assert response.status_code == 413
+    assert stored_files() == before
+
+
+def test_declared_length_over_limit_is_refused_before_parsing(db, client, monkeypatch):
+    user = make_user(db, "alice")
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 100_000)
+
+    response = client.post(
+        "/api/upload/image",
+        files={"file": ("big.png", PNG, "image/png")},
+        headers=auth_headers(user),
+    )
+
+    assert response.status_code == 413
+
+
+def test_identical_uploads_are_stored_once(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+
+    first = client.post("/api/upload/image", files={"file": ("a.png", PNG, "image/png")}, headers=auth_headers(alice)).json()
+    second = client.post("/api/upload/image", files={"file": ("copy.png", PNG, "image/png")}, headers=auth_headers(bob)).json()
+
+    assert first["image_url"] == second["image_url"]
+    assert first["image_url"] == main.blob_url(hashlib.sha256(PNG).hexdigest(), "png")
+    assert not first["deduplicated"] and second["deduplicated"]
+    assert db.query(main.UploadBlob).count() == 1
+    assert os.listdir(os.path.join(main.UPLOAD_DIR, "tmp")) == []
+
+
+def test_shared_blob_is_unlinked_only_when_the_last_reference_goes(db, client, monkeypatch):
+    monkeypatch.setattr(main, "UPLOAD_PENDING_GRACE_SECONDS", 0)
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    url = client.post("/api/upload/image", files={"file": ("a.png", PNG, "image/png")}, headers=auth_headers(alice)).json()["image_url"]
+    post_id = client.post("/api/posts", json={"content": "mine", "image_url": url}, headers=auth_headers(alice)).json()["id"]
+    client.post("/api/users/me/upload-profile-picture", files={"file": ("a.png", PNG, "image/png")}, headers=auth_headers(bob))
+    blob = db.query(main.UploadBlob).one()
+    assert blob.ref_count == 2
+
+    client.delete(f"/api/posts/{post_id}", headers=auth_headers(alice))
+    db.refresh(blob)
+    assert blob.ref_count == 1
+    assert os.path.exists(main.upload_path(url))
+
+    other = PNG + b"\x01"
+    response = client.post("/api/users/me/upload-profile-picture", files={"file": ("b.png", other, "image/png")}, headers=auth_headers(bob))
+
+    assert response.status_code == 200
+    assert not os.path.exists(main.upload_path(url))
+    assert db.query(main.UploadBlob.sha256).all() == [(hashlib.sha256(other).hexdigest(),)]
+    assert main.reconcile_counters(db, dry_run=True) == []
+
+
+def test_unreferenced_fresh_upload_survives_a_release(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    url = client.post("/api/upload/image", files={"file": ("a.png", PNG, "image/png")}, headers=auth_headers(alice)).json()["image_url"]
+    post_id = client.post("/api/posts", json={"content": "mine", "image_url": url}, headers=auth_headers(alice)).json()["id"]
+
+    # Bob uploads the same picture and is about to post it when Alice deletes hers
+    client.post("/api/upload/image", files={"file": ("same.png", PNG, "image/png")}, headers=auth_headers(bob))
+    client.delete(f"/api/posts/{post_id}", headers=auth_headers(alice))
+
+    assert os.path.exists(main.upload_path(url))
+    assert db.query(main.UploadBlob).one().ref_count == 0
+
+
+def test_released_blob_files_are_removed_only_after_commit(db, client, monkeypatch):
+    monkeypatch.setattr(main, "UPLOAD_PENDING_GRACE_SECONDS", 0)
+    alice = make_user(db, "alice")
+    url = client.post("/api/upload/image", files={"file": ("a.png", PNG, "image/png")}, headers=auth_headers(alice)).json()["image_url"]
+
+    main.release_upload(db, url)
+    assert os.path.exists(main.upload_path(url))
+    db.rollback()
+    assert os.path.exists(main.upload_path(url))
+    assert db.query(main.UploadBlob).count() == 1
+
+    main.release_upload(db, url)
+    db.commit()
+    assert not os.path.exists(main.upload_path(url))
+    assert db.query(main.UploadBlob).count() == 0
+
+
+def test_chunked_upload_without_length_is_cut_off_while_receiving(db, client, monkeypatch):
+    user = make_user(db, "alice")
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 100_000)
+    boundary = "limit-test"
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="big.png"\r\n'
+        f"Content-Type: image/png\r\n\r\n".encode(),
+        *(PNG[i:i + 65536] for i in range(0, len(PNG), 65536)),
+        f"\r\n--{boundary}--\r\n".encode(),
+    ]
+    parsed = []
+    monkeypatch.setattr(main, "save_upload", lambda file: parsed.append(file))
+
+    def body():
+        yield from parts
+
+    response = client.post(
+        "/api/upload/image",
+        content=body(),
+        headers={**auth_headers(user), "Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+
+    assert response.status_code == 413
+    assert "content-length" not in {name.lower() for name in response.request.headers}
+    assert parsed == []  # refused before the handler saw a parsed form
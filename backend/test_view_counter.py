@@ -0,0 +1,68 @@
+from fastapi.testclient import TestClient
+
+import main
+from conftest import make_user, auth_headers
+from test_hydration import QueryCounter
+
+
+def make_post(db, owner):
+    post = main.Post(title="t", content="c", owner_id=owner.id)
+    db.add(post)
+    db.commit()
+    return post
+
+
+def test_views_are_buffered_then_flushed_in_one_update(db, client):
+    alice = make_user(db, "alice")
+    first, second = make_post(db, alice), make_post(db, alice)
+    headers = auth_headers(alice)
+    for post_id in (first.id, first.id, second.id):
+        assert client.get(f"/api/posts/{post_id}", headers=headers).status_code == 200
+
+    db.expire_all()
+    assert (first.view_count, second.view_count) == (0, 0)
+
+    with QueryCounter(main.engine) as counter:
+        assert main.view_counter.flush() == 3
+    updates = [s for s in counter.statements if s.startswith("UPDATE")]
+    assert updates[0] == counter.statements[0]
+    assert [s.split()[1] for s in updates] == ["posts", "users"]  # one per table, however many posts
+
+    db.expire_all()
+    assert (first.view_count, second.view_count) == (2, 1)
+    assert alice.views_received_count == 3
+    assert main.view_counter.flush() == 0
+
+
+def test_threshold_triggers_flush(db):
+    alice = make_user(db, "alice")
+    post = make_post(db, alice)
+    buffer = main.ViewCounterBuffer(threshold=3)
+    for _ in range(3):
+        buffer.record(post.id)
+    db.expire_all()
+    assert post.view_count == 3
+    assert buffer.stats()["pending_views"] == 0
+
+
+def test_stats_overview_includes_buffered_views(db, client):
+    alice = make_user(db, "alice")
+    bob = make_user(db, "bob")
+    post = make_post(db, alice)
+    other = make_post(db, bob)
+    client.get(f"/api/posts/{post.id}", headers=auth_headers(bob))
+    client.get(f"/api/posts/{other.id}", headers=auth_headers(bob))
+    stats = client.get("/api/stats/overview", headers=auth_headers(alice)).json()
+    assert stats["total_views"] == 1
+    main.view_counter.flush()
+    assert client.get("/api/stats/overview", headers=auth_headers(alice)).json()["total_views"] == 1
+
+
+def test_shutdown_flushes_pending_views(db):
+    alice = make_user(db, "alice")
+    post = make_post(db, alice)
+    main.view_counter.record(post.id)
+    with TestClient(main.app):
+        pass
+    db.expire_all()
+    assert post.view_count == 1
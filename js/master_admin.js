@@ -6,6 +6,11 @@ class UserManager {
         this.allUsers = [];
         this.filteredUsers = [];
         this.currentSearchTerm = '';
+        this.nextCursor = null;
+        this.pagesLoaded = 0;
+        this.pageSize = 50;
+        this.userSummary = null;
+        this.statsRange = 30;
         this.isUpdating = false;
         this.isLoading = false;
         this.cache = new Map();
@@ -49,7 +54,12 @@ class UserManager {
         this.realtimeUpdateInterval = setInterval(async () => {
             if (!this.isLoading) {
                 try {
-                    await this.fetchUsers();
+                    // Reloading the list would drop pages fetched with "Load more"
+                    if (this.pagesLoaded <= 1) {
+                        await this.fetchUsers();
+                    } else {
+                        await this.fetchUserSummary();
+                    }
                 } catch (error) {
                     console.error("Error during real-time update:", error);
                 }
@@ -84,7 +94,25 @@ class UserManager {
 
         const refreshButton = document.getElementById('refresh-data');
         if (refreshButton) {
-            refreshButton.addEventListener('click', this.fetchUsers.bind(this));
+            refreshButton.addEventListener('click', () => this.fetchUsers());
+        }
+
+        const loadMoreButton = document.getElementById('load-more-users');
+        if (loadMoreButton) {
+            loadMoreButton.addEventListener('click', () => this.fetchUsers({ append: true }));
+        }
+
+        const statsRange = document.getElementById('stats-range');
+        if (statsRange) {
+            statsRange.addEventListener('change', (event) => {
+                this.statsRange = Number(event.target.value);
+                this.fetchDashboardStats();
+            });
+        }
+
+        const exportButton = document.getElementById('export-users');
+        if (exportButton) {
+            exportButton.addEventListener('click', () => this.exportUsers());
         }
 
         // Listen for window focus to refresh data
@@ -128,12 +156,13 @@ class UserManager {
     }
 
     /**
-     * Handle search input with debouncing
+     * Handle search input with debouncing; the search runs on the server
      */
     handleSearch(event) {
         clearTimeout(this.debounceTimer);
         this.debounceTimer = setTimeout(() => {
-            this.filterUsers(event.target.value);
+            this.currentSearchTerm = event.target.value.toLowerCase().trim();
+            this.fetchUsers();
         }, 300);
     }
 
@@ -358,6 +387,20 @@ class UserManager {
     /**
      * Get display name for role
      */
+    /**
+     * Add the search term to request params: a role name ("guide", "vice admin")
+     * filters by role, anything else searches usernames and emails
+     */
+    applySearchParams(params) {
+        if (!this.currentSearchTerm) return params;
+        const term = this.currentSearchTerm.replace(/\s+/g, ' ');
+        const role = ['master', 'vice_admin', 'guide', 'member'].find(role =>
+            term === role || term === role.replace('_', ' ') || term === this.getRoleDisplayName(role).toLowerCase()
+        );
+        params.set(role ? 'role' : 'q', role || this.currentSearchTerm);
+        return params;
+    }
+
     getRoleDisplayName(role) {
         const roleNames = {
             'master': 'Master Admin',
@@ -505,10 +548,10 @@ class UserManager {
     }
 
     /**
-     * Fetch users with retry mechanism and caching
+     * Fetch one page of users (the first, or the next with append) with retry and caching
      */
-    async fetchUsers() {
-        const cacheKey = 'users';
+    async fetchUsers({ append = false } = {}) {
+        const cacheKey = `users:${this.currentSearchTerm}`;
         const refreshIcon = document.querySelector('#refresh-data svg');
         
         try {
@@ -517,7 +560,10 @@ class UserManager {
                 refreshIcon.classList.add('spinning');
             }
 
-            const response = await this.makeApiRequest('/api/admin/users', {
+            const params = this.applySearchParams(new URLSearchParams({ limit: this.pageSize }));
+            if (append && this.nextCursor) params.set('cursor', this.nextCursor);
+
+            const response = await this.makeApiRequest(`/api/admin/users?${params}`, {
                 headers: { 'Authorization': `Bearer ${AuthManager.getAuthToken()}` }
             });
 
@@ -527,20 +573,30 @@ class UserManager {
                 throw new Error('Invalid users data received');
             }
 
-            this.allUsers = users;
-            this.filteredUsers = [...users];
-            this.cache.set(cacheKey, { data: users, timestamp: Date.now() });
+            this.nextCursor = response.headers.get('X-Next-Cursor');
+            this.pagesLoaded = append ? this.pagesLoaded + 1 : 1;
+            this.allUsers = append ? this.allUsers.concat(users) : users;
+            this.filteredUsers = [...this.allUsers];
+            this.lastFetch = Date.now();
+            if (!append) {
+                this.cache.set(cacheKey, { data: users, nextCursor: this.nextCursor, timestamp: Date.now() });
+            }
             
+            await this.fetchUserSummary();
             this.renderUsers();
+            this.updateLoadMore();
             await this.fetchDashboardStats();
             
         } catch (error) {
             // Try to use cached data
             const cached = this.cache.get(cacheKey);
-            if (cached && Date.now() - cached.timestamp < 300000) { // 5 minutes
+            if (!append && cached && Date.now() - cached.timestamp < 300000) { // 5 minutes
                 this.allUsers = cached.data;
                 this.filteredUsers = [...cached.data];
+                this.nextCursor = cached.nextCursor;
+                this.pagesLoaded = 1;
                 this.renderUsers();
+                this.updateLoadMore();
                 this.showNotification('Using cached data - some information may be outdated', 'warning');
             } else {
                 this.handleError('Failed to load users', error);
@@ -553,12 +609,53 @@ class UserManager {
         }
     }
 
+    /**
+     * Fetch the number of users per role (the loaded list is only a page)
+     */
+    async fetchUserSummary() {
+        try {
+            const response = await this.makeApiRequest('/api/admin/users/summary');
+            this.userSummary = await response.json();
+            this.updateUserCounts();
+        } catch (error) {
+            console.warn('Failed to fetch user summary:', error);
+        }
+    }
+
+    /**
+     * Show the "Load more" button while the server has further pages
+     */
+    updateLoadMore() {
+        const loadMoreButton = document.getElementById('load-more-users');
+        if (loadMoreButton) {
+            loadMoreButton.classList.toggle('hidden', !this.nextCursor);
+        }
+    }
+
+    /**
+     * Download the (searched) user directory as CSV
+     */
+    async exportUsers() {
+        try {
+            const params = this.applySearchParams(new URLSearchParams({ format: 'csv' }));
+            const response = await this.makeApiRequest(`/api/admin/users/export?${params}`);
+            const url = URL.createObjectURL(await response.blob());
+            const link = document.createElement('a');
+            link.href = url;
+            link.download = 'users.csv';
+            link.click();
+            URL.revokeObjectURL(url);
+        } catch (error) {
+            this.handleError('Failed to export users', error);
+        }
+    }
+
     /**
      * Fetch dashboard statistics with fallback
      */
     async fetchDashboardStats() {
         try {
-            const response = await this.makeApiRequest('/api/admin/stats', {
+            const response = await this.makeApiRequest(`/api/admin/stats?days=${this.statsRange}`, {
                 headers: { 'Authorization': `Bearer ${AuthManager.getAuthToken()}` }
             });
 
@@ -581,6 +678,15 @@ class UserManager {
             { id: 'totalPosts', value: stats.total_posts },
             { id: 'viceAdminCount', value: stats.vice_admins_count }
         ];
+        if (stats.range) {
+            updates.push(
+                { id: 'rangeSignups', value: stats.range.signups },
+                { id: 'rangePosts', value: stats.range.posts },
+                { id: 'rangeLikes', value: stats.range.likes },
+                { id: 'rangeComments', value: stats.range.comments },
+                { id: 'rangeActiveUsers', value: stats.range.average_active_users }
+            );
+        }
 
         updates.forEach(({ id, value }) => {
             const element = document.getElementById(id);
@@ -663,12 +769,9 @@ class UserManager {
     }
 
     updateUserCounts() {
-        const masterCount = this.allUsers.filter(user => user.is_master).length;
-        const viceAdminCount = this.allUsers.filter(user => user.is_vice_admin && !user.is_master).length;
-        const guideCount = this.allUsers.filter(user => user.is_guide && !user.is_master && !user.is_vice_admin).length;
-        const memberCount = this.allUsers.filter(user => !user.is_master && !user.is_vice_admin && !user.is_guide).length;
-
-        const totalUsers = this.allUsers.length;
+        const summary = this.userSummary;
+        const viceAdminCount = summary ? summary.vice_admin : this.allUsers.filter(user => user.is_vice_admin && !user.is_master).length;
+        const totalUsers = summary ? summary.total : this.allUsers.length;
         document.getElementById('totalUsers').textContent = totalUsers.toLocaleString();
         document.getElementById('viceAdminCount').textContent = viceAdminCount.toLocaleString();
         
@@ -110,6 +110,17 @@ window.addEventListener('load', () => {
         });
     }
 
+    const showUnreadCount = (unreadCount) => {
+        const badge = document.getElementById('mobile-notification-badge');
+        if (!badge) return;
+        if (unreadCount > 0) {
+            badge.textContent = unreadCount > 9 ? "9+" : unreadCount;
+            badge.classList.remove('hidden');
+        } else {
+            badge.classList.add('hidden');
+        }
+    };
+
     const updateNotificationBadge = async () => {
         const badge = document.getElementById('mobile-notification-badge');
         if (!badge) return;
@@ -127,29 +138,62 @@ window.addEventListener('load', () => {
             }
 
             const data = await response.json();
-            const unreadCount = data.unread_count;
-
-            if (unreadCount > 0) {
-                if (unreadCount > 9) {
-                    badge.textContent = "9+";
-                } else {
-                    badge.textContent = unreadCount;
-                }
-                badge.classList.remove('hidden');
-            } else {
-                badge.classList.add('hidden');
-            }
+            showUnreadCount(data.unread_count);
         } catch (error) {
             console.error('Error updating notification badge:', error);
             badge.classList.add('hidden'); // Hide badge on error
         }
     };
 
-    // Update badge on load
-    updateNotificationBadge();
-
-    // Update badge every 30 seconds
-    setInterval(updateNotificationBadge, 30000);
+    // New notifications and unread-count changes are pushed over server-sent
+    // events. The stream is opened with a short-lived stream token instead of
+    // the access token, so once a reconnect is refused after it expires, the
+    // stream is reopened with a fresh token from the last event seen.
+    // Browsers without EventSource fall back to polling every 30 seconds.
+    if (window.EventSource) {
+        let stream = null;
+        let lastEventId = null;
+        let unloading = false;
+        const openStream = async () => {
+            try {
+                const response = await window.AuthAPI.request('/api/notifications/stream-token', {
+                    method: 'POST'
+                });
+                if (!response.ok) {
+                    throw new Error('Failed to get a notification stream token');
+                }
+                const params = new URLSearchParams({ token: (await response.json()).token });
+                if (lastEventId) {
+                    params.set('last_event_id', lastEventId);
+                }
+                stream = new EventSource(`${API_BASE_URL}/api/notifications/stream?${params}`);
+            } catch (error) {
+                console.error('Error opening notification stream:', error);
+                setTimeout(openStream, 30000);
+                return;
+            }
+            stream.addEventListener('unread', (event) => {
+                showUnreadCount(JSON.parse(event.data).unread_count);
+            });
+            stream.addEventListener('notification', (event) => {
+                lastEventId = event.lastEventId || lastEventId;
+                loadNotifications();
+            });
+            stream.addEventListener('error', () => {
+                if (stream.readyState === EventSource.CLOSED && !unloading) {
+                    setTimeout(openStream, 1000);
+                }
+            });
+        };
+        openStream();
+        window.addEventListener('beforeunload', () => {
+            unloading = true;
+            if (stream) stream.close();
+        });
+    } else {
+        updateNotificationBadge();
+        setInterval(updateNotificationBadge, 30000);
+    }
 
     // Mark all as read functionality
     const markAllReadBtn = document.getElementById('mark-all-read-btn');